@@ -0,0 +1,244 @@
+"""
+Verify response fixtures from the command line, without a test suite.
+
+Example::
+
+    python -m responsediff --settings project.settings --workers 8 / /about/
+
+Crawl from each URL with ``django.test.Client`` in parallel worker processes,
+diff each response against its fixture in ``--fixtures``, and exit with status
+1 if any fixture was created, differs, or is stale: in the directory of a
+start URL but not used by any crawled URL.
+
+Views run against a freshly created and migrated test database, so it only
+holds data created by migrations. With ``--keepdb``, the test database is
+reused between runs instead.
+"""
+import argparse
+import json
+import os
+import sys
+
+from . import response as response_module
+from .client import ParallelClient
+from .response import Response, crossplatform_compatible
+from .test import ResponseDiffTestMixin
+
+FIXTURES = 'cli_response_fixtures'
+
+
+class Crawler(ResponseDiffTestMixin):
+    """Crawler with fixtures in a directory instead of next to a test."""
+
+    def __init__(self, fixtures, urls, strip_parameters=None, follow=True):
+        """Instanciate a crawler with a fixtures directory and start urls."""
+        self.fixtures = os.path.abspath(fixtures)
+        self.urls = urls
+        self.strip_parameters = strip_parameters or []
+        self.follow = follow
+
+    def skip_url(self, url):
+        """Skip all links unless follow, and those skipped by default."""
+        return not self.follow or super(Crawler, self).skip_url(url)
+
+    def responsediff_fixture(self, url):
+        """Return the Response fixture for url in the fixtures directory."""
+        return Response.for_url(self.fixtures, url)
+
+    def responsediff_stale_roots(self):
+        """
+        Return the fixture directories of start urls.
+
+        Only fixtures of URLs under a start URL are owned by the crawl, a
+        directory inside another one is not returned to scan it only once.
+        """
+        roots = sorted(set(
+            crossplatform_compatible(
+                self.responsediff_fixture(url).path.rstrip('/'))
+            for url in self.urls
+        ))
+        return [
+            root for root in roots
+            if not [
+                parent for parent in roots
+                if root.startswith(parent.rstrip(os.sep) + os.sep)
+            ]
+        ]
+
+
+def get_parser():
+    """Return the ArgumentParser for the command."""
+    parser = argparse.ArgumentParser(
+        prog='python -m responsediff',
+        description='Crawl URLs and diff responses against fixtures.',
+    )
+    parser.add_argument(
+        'urls', nargs='*', default=['/'], metavar='URL',
+        help='URLs to start crawling from, default: /')
+    parser.add_argument(
+        '--settings',
+        help='Django settings module, default: DJANGO_SETTINGS_MODULE')
+    parser.add_argument(
+        '--fixtures',
+        help='Fixtures directory, default: %s' % FIXTURES)
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help='Number of worker processes, default: 4')
+    parser.add_argument(
+        '--selector',
+        help='Only diff elements matching this selector, except on first URL')
+    parser.add_argument(
+        '--strip-parameter', action='append', dest='strip_parameters',
+        metavar='NAME', help='GET parameter to remove from crawled URLs')
+    parser.add_argument(
+        '--no-follow', action='store_true',
+        help='Only diff the given URLs, do not crawl their links')
+    parser.add_argument(
+        '--rewrite', action='store_true',
+        help='Rewrite fixtures which differ, like FIXTURE_REWRITE')
+    parser.add_argument(
+        '--prune', action='store_true',
+        help='Delete stale fixtures instead of failing, requires --fixtures')
+    parser.add_argument(
+        '--only-changed', action='store_true',
+        help='Only report URLs which fixtures were created or differ')
+    parser.add_argument(
+        '--report', choices=['text', 'json'], default='text',
+        help='Report format, default: text')
+    parser.add_argument(
+        '--keepdb', action='store_true',
+        help='Preserve the test database between runs, otherwise views run '
+             'against a freshly migrated one')
+    return parser
+
+
+def parse_args(argv=None):
+    """Return the parsed arguments for argv, with defaults."""
+    parser = get_parser()
+    args = parser.parse_args(argv)
+
+    if args.fixtures is None:
+        if args.prune:
+            parser.error('--prune requires an explicit --fixtures')
+        args.fixtures = FIXTURES
+
+    return args
+
+
+def crawl(args):
+    """Crawl and diff, return the list of report entries and stale files."""
+    crawler = Crawler(args.fixtures, args.urls, args.strip_parameters,
+                      follow=not args.no_follow)
+    client = ParallelClient(concurrency=args.workers)
+
+    entries = []
+    covered = []
+    try:
+        results = crawler.responsediff_parallel_crawl(
+            list(args.urls), client, covered, selector=args.selector)
+        for url, fixture, diffs, created in results:
+            if fixture.rewritten:
+                status = 'rewritten'
+            elif created:
+                status = 'created'
+            elif diffs:
+                status = 'changed'
+            else:
+                status = 'ok'
+
+            entries.append(dict(
+                url=url,
+                status=status,
+                created=sorted(created),
+                rewritten=fixture.rewritten,
+                diffs={
+                    cmd: out.decode('utf8') for cmd, out in diffs.items()
+                },
+            ))
+    finally:
+        client.close()
+
+    # Only the given URLs were crawled, their directories are not covered
+    if args.no_follow:
+        return entries, []
+
+    return entries, crawler.responsediff_stale(args.prune)
+
+
+def report(entries, stale, args, stream):
+    """Write the report of entries and stale files to stream."""
+    summary = {}
+    for entry in entries:
+        summary.setdefault(entry['status'], 0)
+        summary[entry['status']] += 1
+    if stale:
+        summary['stale'] = len(stale)
+
+    if args.only_changed:
+        entries = [e for e in entries if e['status'] != 'ok']
+
+    if args.report == 'json':
+        json.dump(
+            dict(summary=summary, urls=entries, stale=stale),
+            stream,
+            indent=4,
+            sort_keys=True,
+        )
+        stream.write('\n')
+        return
+
+    for entry in entries:
+        stream.write('[%s] %s\n' % (entry['status'], entry['url']))
+        for cmd, out in entry['diffs'].items():
+            stream.write('%s\n%s\n' % (cmd, out))
+
+    for path in stale:
+        stream.write('[stale] %s\n' % path)
+
+    stream.write(', '.join(
+        '%s %s' % (count, status) for status, count in sorted(summary.items())
+    ) + '\n')
+
+
+def run(args, stream=None):
+    """Crawl, report and return the exit status."""
+    rewrite = response_module.REWRITE
+    if args.rewrite:
+        response_module.REWRITE = '1'
+
+    try:
+        entries, stale = crawl(args)
+    finally:
+        response_module.REWRITE = rewrite
+    report(entries, stale, args, stream or sys.stdout)
+
+    failed = [e for e in entries if e['status'] in ('created', 'changed')]
+    return 1 if failed or stale else 0
+
+
+def main(argv=None):
+    """Set up Django and a test environment, then run the command."""
+    args = parse_args(argv)
+
+    if args.settings:
+        os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+
+    import django
+    django.setup()
+
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+    from django.test.utils import teardown_test_environment
+
+    setup_test_environment(debug=False)
+    runner = DiscoverRunner(verbosity=0, keepdb=args.keepdb)
+    old_config = runner.setup_databases()
+    try:
+        return run(args)
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
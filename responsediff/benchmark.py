@@ -0,0 +1,108 @@
+"""Repeated-run latency measures and regression detection."""
+import json
+import math
+import os
+import time
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def measure(get, url, repeat=10, warmup=1):
+    """Return the list of durations of repeat get(url) calls after warmup."""
+    for i in range(warmup):
+        get(url)
+
+    durations = []
+    for i in range(repeat):
+        start = timer()
+        get(url)
+        durations.append(timer() - start)
+    return durations
+
+
+def percentile(samples, percent):
+    """Return the nearest-rank percentile of samples."""
+    ordered = sorted(samples)
+    rank = int(math.ceil(percent / 100. * len(ordered)))
+    return ordered[max(rank, 1) - 1]
+
+
+def median(samples):
+    """Return the median of samples."""
+    ordered = sorted(samples)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2.
+
+
+def summarize(samples):
+    """Return the baseline dict for samples: median, p95 and samples."""
+    return dict(
+        median=median(samples),
+        p95=percentile(samples, 95),
+        samples=samples,
+    )
+
+
+def slower_probability(baseline, samples):
+    """
+    Return the p-value of samples not being slower than baseline.
+
+    This is a one-sided Mann-Whitney U test with the normal approximation,
+    which makes no assumption on the distribution of latencies. A low value
+    means samples are significantly slower than baseline.
+    """
+    values = [(value, True) for value in samples]
+    values += [(value, False) for value in baseline]
+    values.sort()
+
+    # Sum of ranks of samples, tied values get their average rank
+    rank_sum = 0.
+    i = 0
+    while i < len(values):
+        j = i
+        while j < len(values) and values[j][0] == values[i][0]:
+            j += 1
+        rank = (i + j + 1) / 2.
+        rank_sum += rank * len([v for v in values[i:j] if v[1]])
+        i = j
+
+    n1, n2 = len(samples), len(baseline)
+    u = rank_sum - n1 * (n1 + 1) / 2.
+    sigma = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12.)
+    if not sigma:
+        return 1.
+
+    z = (u - n1 * n2 / 2. - .5) / sigma
+    return .5 * math.erfc(z / math.sqrt(2))
+
+
+def regression(baseline, samples, threshold=.2, alpha=.05):
+    """
+    Return the p-value if samples regressed from baseline, None otherwise.
+
+    Samples regressed if their median exceeds the baseline median by more
+    than threshold, ie. .2 for 20%, and they are slower with a significance
+    of alpha.
+    """
+    if median(samples) <= baseline['median'] * (1 + threshold):
+        return None
+
+    p = slower_probability(baseline['samples'], samples)
+    return p if p < alpha else None
+
+
+def load(path):
+    """Return the baselines by URL from path, if it exists."""
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def dump(path, baselines):
+    """Write baselines by URL to path."""
+    with open(path, 'w+') as f:
+        json.dump(baselines, f, indent=4, sort_keys=True)
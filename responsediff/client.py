@@ -0,0 +1,103 @@
+"""In-process test client fetching and diff-ing URLs in worker processes."""
+import multiprocessing
+import multiprocessing.util
+
+from django import test
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from .live import LiveResponse
+
+# Test client of a worker process, see _init_worker()
+_client = None
+
+
+def get(client, url):
+    """
+    GET url with client and return a picklable copy of the response.
+
+    The copy is a LiveResponse, with the query count of the request in
+    ``responsediff_metadata``. The chunks of a streaming response are joined
+    as ``make_diff()`` would, and kept in ``streaming_content`` so that the
+    crawler still treats it as streaming.
+    """
+    with CaptureQueriesContext(connections['default']) as queries:
+        response = client.get(url)
+
+    streaming = hasattr(response, 'streaming_content')
+    if streaming:
+        chunks = list(response.streaming_content)
+        content = b'\n'.join(chunks)
+    else:
+        content = response.content
+
+    result = LiveResponse(response.status_code, response.items(), content)
+    if streaming:
+        result.streaming_content = chunks
+    result.responsediff_metadata = {'query_count': len(queries)}
+    return result
+
+
+def _init_worker(defaults):
+    """Create the test client of a worker process."""
+    global _client
+    _client = test.Client(**defaults)
+
+    # Close database connections when the worker exits, otherwise the test
+    # database can't be dropped
+    multiprocessing.util.Finalize(None, connections.close_all, exitpriority=1)
+
+
+def _get(url):
+    """GET url with the test client of the worker process."""
+    return get(_client, url)
+
+
+class ParallelClient(object):
+    """
+    Fetch and diff URLs with ``django.test.Client`` in worker processes.
+
+    Views run in the process of the test client, so threads would be
+    serialized by the GIL, and they would share the request signals which
+    the test client connects and disconnects. Instead, each of the
+    ``concurrency`` workers is a forked process with its own test client and
+    database connection, that of the test database set up before.
+
+    ``get_many()`` returns picklable copies of the responses, see ``get()``,
+    and ``map()`` runs a picklable function in the workers, ie. a bound
+    method of a crawler to diff responses. With a concurrency of 1, all runs
+    in the current process.
+    """
+
+    base_url = 'http://testserver'
+
+    def __init__(self, concurrency=4, **defaults):
+        """Instanciate with defaults for django.test.Client()."""
+        self.pool = None
+        self.client = None
+
+        if concurrency > 1:
+            # Workers must open their own connections, not share ours
+            connections.close_all()
+            self.pool = multiprocessing.get_context('fork').Pool(
+                concurrency, _init_worker, (defaults,))
+        else:
+            self.client = test.Client(**defaults)
+
+    def get_many(self, urls):
+        """Return the list of responses for urls, fetched in parallel."""
+        if self.pool:
+            return self.pool.map(_get, urls)
+        return [get(self.client, url) for url in urls]
+
+    def map(self, func, items):
+        """Return the list of func results for items, run in parallel."""
+        if self.pool:
+            return self.pool.map(func, items)
+        return [func(item) for item in items]
+
+    def close(self):
+        """Wait for worker processes to close their connections and exit."""
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
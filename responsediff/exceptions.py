@@ -8,12 +8,32 @@ class ResponseDiffException(Exception):
 class DiffsFound(ResponseDiffException):
     """Raised when a test has failed."""
 
-    def __init__(self, diffs, created):
+    def __init__(self, diffs, created, stale=None):
         """Exception for when a diff command had output."""
         message = [''] + [  # one empty line
             '[created] %s:\n%s' % (k, v[:60]) for k, v in created.items()
+        ] + [
+            '[stale] %s' % path for path in stale or []
         ] + [
             '%s\n%s' % (cmd, out.decode('utf8'))
             for cmd, out in diffs.items()
         ]
         super(DiffsFound, self).__init__('\n'.join(message))
+
+
+class LatencyRegression(ResponseDiffException):
+    """Raised when responses got significantly slower than their baseline."""
+
+    def __init__(self, regressions):
+        """Exception for a dict of url: (baseline, measure, p-value)."""
+        message = [''] + [  # one empty line
+            '%s: median %.1fms -> %.1fms, p95 %.1fms -> %.1fms, p=%.4f' % (
+                url,
+                baseline['median'] * 1000,
+                measure['median'] * 1000,
+                baseline['p95'] * 1000,
+                measure['p95'] * 1000,
+                p,
+            ) for url, (baseline, measure, p) in sorted(regressions.items())
+        ]
+        super(LatencyRegression, self).__init__('\n'.join(message))
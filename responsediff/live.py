@@ -0,0 +1,121 @@
+"""HTTP client to crawl a running server with pooled keep-alive connections."""
+import socket
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from six.moves import http_client, queue
+from six.moves.urllib.parse import urlsplit
+
+
+class LiveResponse(object):
+    """
+    Response from a live server, quacking like a Django response.
+
+    It supports what ``Response.make_diff()`` and the crawler need: a
+    ``status_code``, a ``content`` attribute, and case-insensitive header
+    lookup with ``response['Content-Type']`` and ``'Location' in response``.
+    """
+
+    def __init__(self, status_code, headers, content):
+        """Instanciate a response with headers as a list of tuples."""
+        self.status_code = status_code
+        self.headers = {k.lower(): v for k, v in headers}
+        self.content = content
+
+    def __getitem__(self, name):
+        """Return the value of the header."""
+        return self.headers[name.lower()]
+
+    def __contains__(self, name):
+        """Return True if the response has this header."""
+        return name.lower() in self.headers
+
+
+class LiveClient(object):
+    """
+    Client for a live server, ie. LiveServerTestCase.live_server_url.
+
+    Connections are kept alive and reused from a pool, and ``get_many()``
+    fetches URLs in parallel with at most ``concurrency`` requests at a time.
+    Responses are requested gzipped, as a browser would, and decompressed
+    before being returned so that they can be diff-ed.
+
+    .. code-block:: python
+
+        client = LiveClient(self.live_server_url, concurrency=8)
+        responses = client.get_many(['/', '/about/'])
+        client.close()
+    """
+
+    def __init__(self, base_url, concurrency=4, timeout=30):
+        """Instanciate a client for a server, ie. http://localhost:8000."""
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip('/')
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.pool = queue.LifoQueue()
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def connect(self):
+        """Return a new connection to the server."""
+        if self.scheme == 'https':
+            cls = http_client.HTTPSConnection
+        else:
+            cls = http_client.HTTPConnection
+        return cls(self.netloc, timeout=self.timeout)
+
+    def request(self, conn, url):
+        """Send a GET request for url on conn and return a LiveResponse."""
+        conn.request('GET', url, headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+        content = response.read()
+
+        if response.getheader('Content-Encoding') == 'gzip':
+            content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+
+        result = LiveResponse(
+            response.status,
+            response.getheaders(),
+            content,
+        )
+        return result, response.will_close
+
+    def get(self, url):
+        """
+        GET url with a connection from the pool.
+
+        A pooled connection may have been closed by the server in the
+        meantime, in which case the request is retried once on a new one.
+        """
+        try:
+            conn, reused = self.pool.get_nowait(), True
+        except queue.Empty:
+            conn, reused = self.connect(), False
+
+        try:
+            result, will_close = self.request(conn, url)
+        except (http_client.HTTPException, socket.error):
+            conn.close()
+            if not reused:
+                raise
+            conn = self.connect()
+            result, will_close = self.request(conn, url)
+
+        if will_close:
+            conn.close()
+        else:
+            self.pool.put(conn)
+
+        return result
+
+    def get_many(self, urls):
+        """Return the list of responses for urls, fetched in parallel."""
+        return list(self.executor.map(self.get, urls))
+
+    def close(self):
+        """Close pooled connections and stop worker threads."""
+        self.executor.shutdown()
+        while not self.pool.empty():
+            self.pool.get_nowait().close()
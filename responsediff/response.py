@@ -5,6 +5,7 @@ import json
 import os
 import re
 import subprocess
+import sys
 import tempfile
 
 from bs4 import BeautifulSoup
@@ -20,6 +21,7 @@ CROSSPLATFORM_COMPATIBLE_NOT = (
 )
 
 REWRITE = os.getenv('FIXTURE_REWRITE')
+PRUNE = os.getenv('FIXTURE_PRUNE')
 
 
 def crossplatform_compatible(value):
@@ -37,6 +39,67 @@ def diff(first, second):
     return cmd, out
 
 
+def write_if_changed(path, content, mode):
+    """
+    Write content to path unless it already holds exactly that content.
+
+    Return True if the file was written, False if it was left untouched,
+    which spares write I/O and mtime changes on unchanged fixtures.
+    """
+    if os.path.exists(path):
+        with open(path, 'rb' if 'b' in mode else 'r') as f:
+            if f.read() == content:
+                return False
+
+    with open(path, mode) as f:
+        f.write(content)
+    return True
+
+
+def is_html(response):
+    """Return True if response has an HTML Content-Type header."""
+    if 'Content-Type' not in response:
+        return False
+    return response['Content-Type'].startswith('text/html')
+
+
+def is_fixture(filename):
+    """Return True if filename is a content or metadata fixture or region."""
+    parts = filename.split('.')
+    for suffix in ('content', 'metadata'):
+        if parts[-1] == suffix or suffix in parts[-2:-1]:
+            return True
+    return False
+
+
+def stale_fixtures(root, expected):
+    """
+    Return the sorted list of fixture files in root which are not expected.
+
+    The fixture tree is scanned once and each file is looked up in a set, so
+    this is linear in the number of fixtures. Files which are not fixtures,
+    see ``is_fixture()``, are left alone.
+    """
+    expected = set(expected)
+    stale = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if is_fixture(filename) and path not in expected:
+                stale.append(path)
+    return sorted(stale)
+
+
+def prune_fixtures(root, paths):
+    """Delete fixture paths and the directories they leave empty in root."""
+    for path in paths:
+        os.unlink(path)
+
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        if dirpath != root and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+
+
 class Response(object):
     """
     Object to use in tests.
@@ -72,13 +135,16 @@ class Response(object):
     investigation.
     """
 
-    def __init__(self, path):
+    def __init__(self, path, region=None):
         """
         Instanciate a response object with a path to a fixture.
 
-        Note that the ``for_test()`` class-method will generate a path.
+        Note that the ``for_test()`` class-method will generate a path, and
+        ``region()`` the response of a region of the fixture.
         """
         self.path = path
+        self.region_name = region
+        self.rewritten = []
 
     def assertNoDiff(self, response, selector=None, replace=None):  # noqa
         """Backward compatibility method for pre-assertWebsiteSame versions."""
@@ -101,17 +167,34 @@ class Response(object):
         if created or diffs:
             raise DiffsFound(diffs, created)
 
-    def make_diff(self, response, metadata=None, selector=None):  # noqa: C901
+    def make_diff(self, response, metadata=None, selector=None,  # noqa: C901
+                  soup=None):
         """
         Compare a response object with the fixture.
 
         If the fixture doesn't exist, create it, otherwise run GNU-diff and
         return a list of diff outputs with their commands.
 
+        With FIXTURE_REWRITE, only fixtures which content differs are
+        written, their paths are appended to ``self.rewritten`` and reported
+        on stderr, and no diff is run.
+
+        The selector may also be a dict of name: selector, see
+        ``make_diff_regions()``.
+
         Return created file list and dict of diffs.
         """
-        if not os.path.exists(os.path.dirname(self.content_path)):
-            os.makedirs(os.path.dirname(self.content_path))
+        if isinstance(selector, dict):
+            return self.make_diff_regions(response, metadata, selector)
+
+        dirname = os.path.dirname(self.content_path)
+        if not os.path.exists(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                # Another process may have created it in the meantime
+                if not os.path.isdir(dirname):
+                    raise
 
         diffs = {}
         created = {}
@@ -121,11 +204,10 @@ class Response(object):
         if 'Location' in response:
             metadata['Location'] = response['Location']
 
-        is_html = response['Content-Type'].startswith('text/html')
         is_streaming = hasattr(response, 'streaming_content')
 
-        if selector and is_html and not is_streaming:
-            soup = BeautifulSoup(response.content, 'html5lib')
+        if selector and is_html(response) and not is_streaming:
+            soup = soup or BeautifulSoup(response.content, 'html5lib')
             elements = soup.select(selector)
             content = '\n---\n'.join(map(str, elements))
             mode = 'w+'
@@ -138,17 +220,28 @@ class Response(object):
                 )
             mode = 'wb+'
 
-        if not os.path.exists(self.content_path) or REWRITE:
+        serialized = json.dumps(metadata, indent=4, sort_keys=True)
+
+        if REWRITE:
+            for path, data, path_mode in (
+                    (self.content_path, content, mode),
+                    (self.metadata_path, serialized, 'w+')):
+                if write_if_changed(path, data, path_mode):
+                    self.rewritten.append(path)
+                    sys.stderr.write('[rewritten] %s\n' % path)
+
+            # Fixtures now match by definition, diff-ing would be redundant
+            return diffs, created
+
+        if not os.path.exists(self.content_path):
             with open(self.content_path, mode) as f:
                 f.write(content)
-            if not REWRITE:
-                created[self.content_path] = content
+            created[self.content_path] = content
 
-        if not os.path.exists(self.metadata_path) or REWRITE:
+        if not os.path.exists(self.metadata_path):
             with open(self.metadata_path, 'w+') as f:
-                json.dump(metadata, f, indent=4, sort_keys=True)
-            if not REWRITE:
-                created[self.metadata_path] = json.dumps(metadata, indent=4)
+                f.write(serialized)
+            created[self.metadata_path] = serialized
 
         fh, dump_path = tempfile.mkstemp('_responsediff')
         with os.fdopen(fh, mode) as f:
@@ -161,7 +254,7 @@ class Response(object):
 
         metadata_fh, metadata_dump_path = tempfile.mkstemp('_responsediff')
         with os.fdopen(metadata_fh, 'w') as f:
-            json.dump(metadata, f, indent=4, sort_keys=True)
+            f.write(serialized)
 
         cmd, out = diff(self.metadata_path, metadata_dump_path)
         os.unlink(metadata_dump_path)
@@ -170,12 +263,70 @@ class Response(object):
 
         return diffs, created
 
+    def fixture_paths(self, selector=None):
+        """Return the paths of fixture files make_diff() uses for selector."""
+        if isinstance(selector, dict):
+            return [
+                path
+                for name in selector
+                for path in self.region(name).fixture_paths()
+            ]
+
+        return [self.content_path, self.metadata_path]
+
+    def make_diff_regions(self, response, metadata, selectors):
+        """
+        Compare each named selector region with its own fixture.
+
+        The response is parsed once and every selector is evaluated against
+        the same tree. Each region is stored in its own fixture, see
+        ``region()``.
+
+        Return created file list and dict of diffs.
+        """
+        diffs = {}
+        created = {}
+
+        soup = None
+        if is_html(response) and not hasattr(response, 'streaming_content'):
+            soup = BeautifulSoup(response.content, 'html5lib')
+
+        for name, selector in sorted(selectors.items()):
+            region = self.region(name)
+            _diffs, _created = region.make_diff(
+                response,
+                metadata=dict(metadata or {}),
+                selector=selector,
+                soup=soup,
+            )
+            diffs.update(_diffs)
+            created.update(_created)
+            self.rewritten += region.rewritten
+
+        return diffs, created
+
+    def region(self, name):
+        """
+        Return the Response for the region name of this fixture.
+
+        Its files are those of this fixture with a ``.name`` suffix, ie.
+        ``MixinTest.test_x.content.nav`` next to ``MixinTest.test_x.content``,
+        or ``page/content.nav`` next to ``page/content``. Files of crawled URLs
+        always end with ``content`` or ``metadata``, names which could make a
+        region file end like that, with a dot or a slash, are refused.
+        """
+        if name in ('content', 'metadata') or re.search(r'[./\\]', name):
+            raise ValueError('Invalid region name: %r' % name)
+        return type(self)(self.path, region=name)
+
     def filesystem_path(self, suffix):
         """Return the filesystem path for fixture."""
         if self.path.endswith('/'):
             path = os.path.join(self.path, suffix)
         else:
             path = self.path + '.' + suffix
+        if self.region_name:
+            path += '.' + self.region_name
         return crossplatform_compatible(path)
 
     @property
@@ -199,6 +350,11 @@ class Response(object):
             name
         )
 
+        return cls.for_url(path, url, *args, **kwargs)
+
+    @classmethod
+    def for_url(cls, path, url=None, *args, **kwargs):
+        """Instanciate a Response with a path in path for the url if any."""
         if url:
             path = os.path.join(
                 path,
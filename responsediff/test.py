@@ -1,12 +1,17 @@
 """Convenience mixin for TestCases."""
+import functools
+import hashlib
 import re
 
 from django import test
 from django.db import connections
 from django.test.utils import CaptureQueriesContext
 
-from .exceptions import DiffsFound
-from .response import Response
+from . import benchmark as benchmark_module
+from . import response as response_module
+from .exceptions import DiffsFound, LatencyRegression
+from .live import LiveClient
+from .response import Response, prune_fixtures, stale_fixtures
 
 
 def strip_parameters(names, url):
@@ -23,35 +28,94 @@ def strip_parameters(names, url):
     return url
 
 
+def fingerprint(response):
+    """
+    Return a hash of the status, location and normalized response content.
+
+    Whitespace is collapsed, so that pages which only differ by indentation
+    have the same fingerprint.
+    """
+    content = re.sub(b'\\s+', b' ', response.content).strip()
+    location = response['Location'] if 'Location' in response else ''
+
+    return hashlib.sha1(b'\n'.join([
+        str(response.status_code).encode('utf8'),
+        location.encode('utf8'),
+        content,
+    ])).hexdigest()
+
+
+def records_failure(method):
+    """Decorate an assertion method to record its failure on the test."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except Exception:
+            self.responsediff_failed = True
+            raise
+    return wrapper
+
+
 class ResponseDiffTestMixin(object):
     """Adds assertResponseDiffEmpty() method."""
 
+    @records_failure
     def assertResponseDiffEmpty(self, result, selector=None):  # noqa
         """
         Test that result matches fixtures.
 
         When a selector is specified, the result will be parsed as HTML and
         only elements matching this selector will be tested.
+
+        The selector may also be a dict of name: selector, to test several
+        regions of the page from a single parse, each region in its own
+        fixture named after its key, ie.::
+
+            self.assertResponseDiffEmpty(result, {
+                'nav': 'nav',
+                'main': '#content',
+            })
         """
-        Response.for_test(self).assertNoDiff(result, selector)
+        fixture = self.responsediff_fixture(None)
+        self.responsediff_use(fixture, selector)
+        fixture.assertNoDiff(result, selector)
 
-    def assertWebsiteSame(self, url=None, client=None, selector=None):  # noqa
+    @records_failure
+    def assertWebsiteSame(self, url=None, client=None, selector=None,  # noqa
+                          prune=None, benchmark=None):
+        if prune is not None:
+            self.responsediff_prune = prune
+
+        client = client or test.Client()
         covered, diffs, created = self.responsediff_website_crawl(
             url, client, selector=selector)
 
+        regressions = {}
+        if benchmark and not (created or diffs):
+            created, regressions = self.responsediff_benchmark(
+                covered, client, benchmark)
+
         if created or diffs:
             raise DiffsFound(diffs, created)
 
+        if regressions:
+            raise LatencyRegression(regressions)
+
         return covered
 
     def responsediff_website_crawl(self, url=None, client=None, covered=None,
-                                   diffs=None, created=None, selector=None):
+                                   diffs=None, created=None, selector=None,
+                                   fingerprints=None):
         """
         Test your website with one call to this method.
 
-        It returns the list of covered URLs. But before, it tests that all
-        fixtures for this test have been covered, or fails, requiring you the
-        to remove obsolete files to succeed again.
+        It returns the list of covered URLs, diffs and created fixtures. The
+        fixtures it uses are registered with ``responsediff_use()``, to fail
+        the test if others are left in its fixtures directory.
+
+        Links of a page with the same content as a page crawled before are
+        not followed, see ``responsediff_alias()``.
         """
         url = url or '/'
         client = client or test.Client()
@@ -59,6 +123,7 @@ class ResponseDiffTestMixin(object):
             covered = getattr(self, 'covered', [])
         diffs = diffs if diffs is not None else {}
         created = created if created is not None else {}
+        fingerprints = fingerprints if fingerprints is not None else {}
 
         conn = connections['default']
         with CaptureQueriesContext(conn) as queries:
@@ -66,35 +131,27 @@ class ResponseDiffTestMixin(object):
         self.process_response(response)
         metadata = {'query_count': len(queries)}
 
-        _diffs, _created = Response.for_test(self, url).make_diff(
+        alias_of = self.responsediff_alias(url, response, fingerprints)
+        if alias_of:
+            metadata['alias_of'] = alias_of
+
+        # Don't apply selector on first url, so we do the layout once
+        fixture_selector = selector if covered else None
+        fixture = self.responsediff_fixture(url)
+        self.responsediff_use(fixture, fixture_selector)
+        _diffs, _created = fixture.make_diff(
             response,
             metadata=metadata,
-            # Don't apply selector on first url, so we do the layout once
-            selector=selector if covered else None,
+            selector=fixture_selector,
         )
         covered.append(url)
         created.update(_created)
         diffs.update(_diffs)
 
-        if hasattr(response, 'streaming_content'):
+        if alias_of:
             return covered, diffs, created
 
-        results = re.findall(
-            'href="((http://testserver)?/[^"]*)',
-            response.content.decode('utf8')
-        )
-        if 'Location' in response:
-            results.append((response['Location'], ''))
-
-        for result in results:
-            sub_url = re.sub(
-                'http://testserver',
-                '',
-                result[0]
-            )
-
-            sub_url = self.transform_url(sub_url)
-
+        for sub_url in self.responsediff_links(response):
             if sub_url in covered:
                 continue
 
@@ -108,10 +165,319 @@ class ResponseDiffTestMixin(object):
                 diffs=diffs,
                 created=created,
                 selector=selector,
+                fingerprints=fingerprints,
             )
 
         return covered, diffs, created
 
+    @records_failure
+    def assertLiveWebsiteSame(self, url=None, client=None, selector=None,  # noqa
+                              concurrency=4, prune=None, benchmark=None):
+        if prune is not None:
+            self.responsediff_prune = prune
+
+        close = client is None
+        client = client or LiveClient(self.live_server_url, concurrency)
+
+        regressions = {}
+        try:
+            covered, diffs, created = self.responsediff_live_crawl(
+                url, client, selector=selector)
+
+            if benchmark and not (created or diffs):
+                created, regressions = self.responsediff_benchmark(
+                    covered, client, benchmark)
+        finally:
+            if close:
+                client.close()
+
+        if created or diffs:
+            raise DiffsFound(diffs, created)
+
+        if regressions:
+            raise LatencyRegression(regressions)
+
+        return covered
+
+    def responsediff_live_crawl(self, url=None, client=None, covered=None,
+                                diffs=None, created=None, selector=None):
+        """
+        Crawl a running server, ie. in a LiveServerTestCase.
+
+        Same as ``responsediff_website_crawl()``, except that requests go
+        through the real HTTP stack with a LiveClient, which fetches each
+        level of links in parallel over pooled keep-alive connections. Query
+        counts are not recorded in metadata since queries run in the server
+        thread.
+        """
+        close = client is None
+        client = client or LiveClient(self.live_server_url)
+        if not covered:
+            covered = getattr(self, 'covered', [])
+        diffs = diffs if diffs is not None else {}
+        created = created if created is not None else {}
+
+        try:
+            crawl = self.responsediff_parallel_crawl(
+                [url or '/'], client, covered, selector=selector)
+            for sub_url, fixture, _diffs, _created in crawl:
+                created.update(_created)
+                diffs.update(_diffs)
+        finally:
+            if close:
+                client.close()
+
+        return covered, diffs, created
+
+    def responsediff_parallel_crawl(self, urls, client, covered,
+                                    selector=None):
+        """
+        Crawl from urls breadth-first, one ``client.get_many()`` per level.
+
+        Covered URLs are appended to ``covered``. Yield the url, fixture,
+        diffs and created files for each response, in order. Metadata set by
+        the client in ``response.responsediff_metadata``, ie. the query
+        count, is saved along with the status code.
+
+        Responses of a level are diff-ed with ``client.map()`` if the client
+        has it, ie. in the worker processes of a ParallelClient, see
+        ``responsediff_diff()``.
+
+        Links of a page with the same content as a page crawled before are
+        not followed, see ``responsediff_alias()``.
+        """
+        # Don't apply selector on first url, so we do the layout once
+        layout_url = None if covered else urls[0]
+        fingerprints = {}
+        diff_many = getattr(client, 'map', map)
+
+        while urls:
+            covered += urls
+            results = []
+            jobs = []
+
+            for url, response in zip(urls, client.get_many(urls)):
+                self.process_response(response)
+                metadata = dict(
+                    getattr(response, 'responsediff_metadata', None) or {})
+
+                alias_of = self.responsediff_alias(url, response, fingerprints)
+                if alias_of:
+                    metadata['alias_of'] = alias_of
+                else:
+                    results += self.responsediff_links(
+                        response, client.base_url)
+
+                fixture_selector = selector if url != layout_url else None
+                self.responsediff_use(
+                    self.responsediff_fixture(url), fixture_selector)
+                jobs.append((url, response, metadata, fixture_selector))
+
+            for url, result in zip(urls, diff_many(self.responsediff_diff,
+                                                   jobs)):
+                yield (url,) + result
+
+            urls = []
+            for url in results:
+                if url in covered or url in urls:
+                    continue
+
+                if self.skip_url(url):
+                    continue
+
+                urls.append(url)
+
+    def responsediff_diff(self, job):
+        """
+        Diff the response of a url with its fixture.
+
+        Job is a tuple of url, response, metadata and selector, return the
+        fixture, diffs and created files.
+        """
+        url, response, metadata, selector = job
+        fixture = self.responsediff_fixture(url)
+        diffs, created = fixture.make_diff(
+            response,
+            metadata=metadata,
+            selector=selector,
+        )
+        return fixture, diffs, created
+
+    def responsediff_use(self, fixture, selector=None):
+        """
+        Register the files of fixture for selector as used by this test.
+
+        The first call schedules ``responsediff_cleanup()`` to run once, when
+        the test is done, with unittest's ``addCleanup()``.
+        """
+        if not hasattr(self, 'responsediff_used'):
+            self.responsediff_used = set()
+            if hasattr(self, 'addCleanup'):
+                self.addCleanup(self.responsediff_cleanup)
+
+        self.responsediff_used.update(fixture.fixture_paths(selector))
+
+    def responsediff_cleanup(self):
+        """
+        Fail with the stale fixtures of this test, see responsediff_stale().
+
+        Baselines of URLs which the test did not benchmark are also removed
+        from its benchmark file. This is skipped when the test has already
+        failed, since fixtures of assertions which did not run would look
+        stale: when an assertion of this mixin failed, even if the exception
+        was caught, or when unittest reports a failure. Stale fixtures are
+        never pruned when the outcome of the test is unknown.
+        """
+        failed = getattr(self, 'responsediff_failed', None)
+        if failed:
+            return
+
+        if hasattr(self, 'responsediff_benchmarked'):
+            path = self.responsediff_fixture(None).filesystem_path(
+                'benchmark')
+            baselines = benchmark_module.load(path)
+            used = {
+                url: baseline for url, baseline in baselines.items()
+                if url in self.responsediff_benchmarked
+            }
+            if used != baselines:
+                benchmark_module.dump(path, used)
+
+        prune = getattr(self, 'responsediff_prune', None)
+        if failed is None:
+            prune = False
+
+        stale = self.responsediff_stale(prune)
+        if stale:
+            raise DiffsFound({}, {}, stale)
+
+    def doCleanups(self):  # noqa
+        """Record if unittest reports a failure, for responsediff_cleanup()."""
+        # Within a cleanup, unittest resets the outcome to success. The
+        # outcome is private and may be missing, then it stays unknown.
+        outcome = getattr(self, '_outcome', None)
+        if not getattr(self, 'responsediff_failed', None):
+            if hasattr(outcome, 'success'):
+                self.responsediff_failed = not outcome.success
+        return super(ResponseDiffTestMixin, self).doCleanups()
+
+    def responsediff_stale(self, prune=None):
+        """
+        Return fixtures which this test did not use.
+
+        Each of ``responsediff_stale_roots()`` is scanned once and checked
+        against the fixtures registered with ``responsediff_use()``. When
+        prune is True, or by default when FIXTURE_PRUNE is set, stale
+        fixtures are deleted and an empty list is returned.
+        """
+        if prune is None:
+            prune = response_module.PRUNE
+
+        used = getattr(self, 'responsediff_used', set())
+        stale = []
+        for root in self.responsediff_stale_roots():
+            _stale = stale_fixtures(root, used)
+            if not prune:
+                stale += _stale
+            elif _stale:
+                prune_fixtures(root, _stale)
+
+        return stale
+
+    def responsediff_stale_roots(self):
+        """Return the directories which fixtures this test owns."""
+        return [self.responsediff_fixture(None).path]
+
+    def responsediff_benchmark(self, covered, client, repeat=10):
+        """
+        Compare latencies of covered URLs with their baseline.
+
+        Each URL is requested ``benchmark_warmup`` times, default 1, then
+        repeat times to measure its median and p95 latency. A URL regresses
+        when its median is ``benchmark_threshold`` slower than the baseline,
+        default .2 for 20%, with a Mann-Whitney significance of
+        ``benchmark_alpha``, default .05.
+
+        Baselines are stored in a ``benchmark`` file next to the fixtures of
+        this test. URLs without a baseline are added and returned as created,
+        with FIXTURE_REWRITE all baselines are overwritten. Baselines of URLs
+        which the test did not benchmark are removed once it is done, see
+        ``responsediff_cleanup()``.
+
+        Return the created dict and the dict of regressions by URL.
+        """
+        path = self.responsediff_fixture(None).filesystem_path('benchmark')
+        baselines = benchmark_module.load(path)
+        warmup = getattr(self, 'benchmark_warmup', 1)
+        threshold = getattr(self, 'benchmark_threshold', .2)
+        alpha = getattr(self, 'benchmark_alpha', .05)
+
+        if not hasattr(self, 'responsediff_benchmarked'):
+            self.responsediff_benchmarked = set()
+        self.responsediff_benchmarked.update(covered)
+
+        new = []
+        regressions = {}
+        for url in covered:
+            measure = benchmark_module.summarize(
+                benchmark_module.measure(client.get, url, repeat, warmup))
+
+            if url not in baselines or response_module.REWRITE:
+                baselines[url] = measure
+                new.append(url)
+                continue
+
+            p = benchmark_module.regression(
+                baselines[url], measure['samples'], threshold, alpha)
+            if p is not None:
+                regressions[url] = (baselines[url], measure, p)
+
+        created = {}
+        if new:
+            benchmark_module.dump(path, baselines)
+            if not response_module.REWRITE:
+                created[path] = ' '.join(new)
+
+        return created, regressions
+
+    def responsediff_fixture(self, url):
+        """Return the Response fixture for url."""
+        return Response.for_test(self, url)
+
+    def responsediff_alias(self, url, response, fingerprints):
+        """
+        Return the URL first crawled with the same response, if any.
+
+        Otherwise, register the fingerprint of response for url in the
+        fingerprints dict and return None. Crawlers save the returned URL as
+        ``alias_of`` in metadata, and don't follow links of aliases since
+        they were already followed from the first URL.
+        """
+        if hasattr(response, 'streaming_content'):
+            return None
+
+        key = fingerprint(response)
+        if key in fingerprints:
+            return fingerprints[key]
+        fingerprints[key] = url
+
+    def responsediff_links(self, response, host='http://testserver'):
+        """Return the list of transformed URLs that response links to."""
+        if hasattr(response, 'streaming_content'):
+            return []
+
+        results = re.findall(
+            'href="((%s)?/[^"]*)' % re.escape(host),
+            response.content.decode('utf8')
+        )
+        if 'Location' in response:
+            results.append((response['Location'], ''))
+
+        return [
+            self.transform_url(re.sub('^' + re.escape(host), '', result[0]))
+            for result in results
+        ]
+
     def get_content_replace_patterns(self, response):
         """Return a list of pattern:replacement for response contents."""
         return [
@@ -0,0 +1,43 @@
+import mock
+
+import pytest
+
+from responsediff import benchmark
+
+
+def test_measure():  # noqa: D103
+    get = mock.Mock()
+    with mock.patch('responsediff.benchmark.timer') as timer:
+        timer.side_effect = [0, 1, 1, 3, 3, 6]
+        assert benchmark.measure(get, '/', repeat=3, warmup=2) == [1, 2, 3]
+    assert get.call_count == 5
+
+
+@pytest.mark.parametrize('samples,median,p95', [
+    ([3, 1, 2], 2, 3),
+    ([4, 1, 3, 2], 2.5, 4),
+    (list(range(1, 101)), 50.5, 95),
+])
+def test_summarize(samples, median, p95):  # noqa: D103
+    result = benchmark.summarize(samples)
+    assert result['median'] == median
+    assert result['p95'] == p95
+
+
+def test_slower_probability():  # noqa: D103
+    baseline = [1, 1.1, .9, 1.05, .95, 1, 1.02, .98]
+    assert benchmark.slower_probability(baseline, [x * 2 for x in baseline]) < .01
+    assert benchmark.slower_probability(baseline, baseline) > .4
+    assert benchmark.slower_probability(baseline, [x / 2 for x in baseline]) > .99
+
+
+def test_regression():  # noqa: D103
+    baseline = benchmark.summarize([1, 1.1, .9, 1.05, .95, 1, 1.02, .98])
+
+    # Significant but under threshold
+    assert benchmark.regression(baseline, [1.1] * 8, threshold=.2) is None
+
+    # Over threshold but not significant
+    assert benchmark.regression(baseline, [2, .9], threshold=.2) is None
+
+    assert benchmark.regression(baseline, [1.5] * 8, threshold=.2) < .05
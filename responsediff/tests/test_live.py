@@ -0,0 +1,58 @@
+import os
+import shutil
+
+from django import test
+
+from responsediff.exceptions import DiffsFound
+from responsediff.live import LiveClient, LiveResponse
+from responsediff.response import Response
+from responsediff.test import ResponseDiffTestMixin
+
+
+def test_live_response_headers():  # noqa: D103
+    response = LiveResponse(302, [('Location', '/foo')], b'')
+    assert response['location'] == '/foo'
+    assert 'LOCATION' in response
+    assert 'Content-Type' not in response
+
+
+def test_headerless_response(tmpdir):  # noqa: D103
+    response = LiveResponse(204, [], b'')
+    fixture = Response(str(tmpdir.join('page')))
+
+    for selector in (None, 'nav', {'nav': 'nav'}):
+        diffs, created = fixture.make_diff(response, selector=selector)
+        assert created
+        assert fixture.make_diff(response, selector=selector) == ({}, {})
+        for path in fixture.fixture_paths(selector):
+            os.unlink(path)
+
+
+class LiveTest(ResponseDiffTestMixin, test.LiveServerTestCase):
+    def test_get_many(self):
+        client = LiveClient(self.live_server_url, concurrency=2)
+        urls = ['/admin/login/', '/admin/', '/adminfoo/']
+
+        try:
+            responses = client.get_many(urls)
+        finally:
+            client.close()
+
+        assert [r.status_code for r in responses] == [200, 302, 404]
+        assert b'csrfmiddlewaretoken' in responses[0].content
+        assert responses[1]['Location'] == '/admin/login/?next=/admin/'
+
+    def test_assertLiveWebsiteSame(self):  # noqa
+        path = Response.for_test(self).path
+
+        # Ensure we're clean
+        if os.path.exists(path):  # pragma: no cover
+            shutil.rmtree(path)
+
+        # First run should fail
+        with self.assertRaises(DiffsFound):
+            self.assertLiveWebsiteSame('/admin/')
+
+        # Second run should pass
+        covered = self.assertLiveWebsiteSame('/admin/', concurrency=2)
+        assert covered[:2] == ['/admin/', '/admin/login/?next=/admin/']
@@ -0,0 +1,140 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from responsediff import response
+from responsediff.__main__ import parse_args, run
+from responsediff.client import ParallelClient
+
+import six
+
+
+@pytest.fixture
+def fixtures(tmpdir):  # noqa: D103
+    return str(tmpdir.join('response_fixtures'))
+
+
+def command(*argv):  # noqa: D103
+    stream = six.StringIO()
+    status = run(parse_args(list(argv)), stream)
+    return status, stream.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_crawl(fixtures):  # noqa: D103
+    status, out = command('--fixtures', fixtures, '--workers', '2', '/admin/')
+    assert status == 1
+    assert out == '\n'.join([
+        '[created] /admin/',
+        '[created] /admin/login/?next=/admin/',
+        '2 created',
+        '',
+    ])
+
+    status, out = command('--fixtures', fixtures, '/admin/')
+    assert status == 0
+    assert out.endswith('2 ok\n')
+
+    with open(fixtures + '/admin/content', 'w') as f:
+        f.write('fail please')
+
+    status, out = command(
+        '--fixtures', fixtures, '--report', 'json', '--only-changed', '/admin/')
+    assert status == 1
+    report = json.loads(out)
+    assert report['summary'] == {'changed': 1, 'ok': 1}
+    assert [e['url'] for e in report['urls']] == ['/admin/']
+    assert '-fail please' in list(report['urls'][0]['diffs'].values())[0]
+
+    rewrite = response.REWRITE
+    status, out = command('--fixtures', fixtures, '--rewrite', '/admin/')
+    assert status == 0
+    assert out.endswith('1 ok, 1 rewritten\n')
+    assert response.REWRITE == rewrite
+
+
+@pytest.mark.django_db(transaction=True)
+def test_no_follow(fixtures):  # noqa: D103
+    status, out = command(
+        '--fixtures', fixtures, '--workers', '1', '--no-follow', '/admin/')
+    assert out.endswith('1 created\n')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stale(fixtures):  # noqa: D103
+    command('--fixtures', fixtures, '/admin/')
+
+    stale = os.path.join(fixtures, 'admin', 'old', 'content')
+    other = os.path.join(fixtures, 'other', 'content')
+    for path in (stale, other):
+        os.makedirs(os.path.dirname(path))
+        open(path, 'w').close()
+
+    # Only the given URLs are diff-ed, others are not stale
+    status, out = command('--fixtures', fixtures, '--no-follow', '/admin/')
+    assert status == 0
+
+    # Fixtures outside of start URLs directories are not owned
+    status, out = command('--fixtures', fixtures, '/admin/')
+    assert status == 1
+    assert '[stale] %s\n' % stale in out
+    assert other not in out
+    assert out.endswith('2 ok, 1 stale\n')
+
+    status, out = command('--fixtures', fixtures, '--prune', '/admin/')
+    assert status == 0
+    assert out.endswith('2 ok\n')
+    assert not os.path.exists(stale)
+    assert os.path.exists(other)
+
+
+def test_prune_requires_fixtures():  # noqa: D103
+    with pytest.raises(SystemExit):
+        parse_args(['--prune'])
+    assert parse_args([]).fixtures == 'cli_response_fixtures'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_alias(fixtures):  # noqa: D103
+    command('--fixtures', fixtures, '/admin/', '/admin/login/?next=/admin/',
+            '/admin/login/?next=%2Fadmin%2F')
+
+    with open(fixtures + '/admin/login/next=%2Fadmin%2F.metadata') as f:
+        assert json.load(f)['alias_of'] == '/admin/login/?next=/admin/'
+
+
+def worker_pid(item):  # noqa: D103
+    return os.getpid()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_client():  # noqa: D103
+    client = ParallelClient(concurrency=2)
+    try:
+        responses = client.get_many(['/admin/login/', '/admin/'])
+        pids = client.map(worker_pid, range(4))
+    finally:
+        client.close()
+
+    assert [r.status_code for r in responses] == [200, 302]
+    assert 'query_count' in responses[0].responsediff_metadata
+    assert responses[1]['Location'] == '/admin/login/?next=/admin/'
+    assert os.getpid() not in pids
+
+
+def test_main(fixtures):  # noqa: D103
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='')
+    cmd = [
+        sys.executable, '-m', 'responsediff',
+        '--settings', 'responsediff.tests.project.settings',
+        '--fixtures', fixtures,
+        '/admin/',
+    ]
+    cwd = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+
+    assert subprocess.call(cmd, cwd=cwd, env=env) == 1
+    assert subprocess.call(cmd, cwd=cwd, env=env) == 0
@@ -1,20 +1,42 @@
 # -*- coding: utf-8 -*-
+import json
 import os
 import re
 import shutil
+import unittest
 
 from django import http
 from django import test
 
 import mock
 
-from responsediff.exceptions import DiffsFound
+from responsediff.exceptions import DiffsFound, LatencyRegression
 from responsediff.response import Response
 from responsediff.test import ResponseDiffTestMixin
 
 import six
 
 
+class StaleTest(ResponseDiffTestMixin, unittest.TestCase):
+    """Run by MixinTest.test_assertWebsiteSame_stale."""
+
+    __test__ = False
+
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.get.side_effect = lambda url: http.HttpResponse(url)
+
+    def test_crawls(self):
+        self.assertWebsiteSame('/x/', client=self.client)
+        self.assertWebsiteSame('/y/', client=self.client)
+        self.assertResponseDiffEmpty(
+            http.HttpResponse('<nav>n</nav>'), {'nav': 'nav'})
+
+    def test_failed(self):
+        self.assertWebsiteSame('/x/', client=self.client)
+        self.fail('before other assertions')
+
+
 class MixinTest(ResponseDiffTestMixin, test.TestCase):
     def get_client(self, fixtures):
         client = mock.Mock()
@@ -40,6 +62,41 @@ class MixinTest(ResponseDiffTestMixin, test.TestCase):
             'h1, p'
         )
 
+    def test_assertNoDiffSelectors(self):  # noqa
+        subject = Response.for_test(self)
+
+        selectors = {'title': 'h1', 'form': 'form input[type=submit]'}
+
+        # Ensure we're clean
+        for name in selectors:
+            for path in subject.region(name).fixture_paths():
+                if os.path.exists(path):  # pragma: no cover
+                    os.unlink(path)
+        result = test.Client().get('/admin/login/')
+
+        with mock.patch('responsediff.response.BeautifulSoup') as soup:
+            soup.return_value.select.return_value = []
+            subject.make_diff(result, selector=selectors)
+        assert soup.call_count == 1
+
+        for name in selectors:
+            for path in subject.region(name).fixture_paths():
+                os.unlink(path)
+
+        # First run should fail
+        with self.assertRaises(DiffsFound):
+            self.assertResponseDiffEmpty(result, selectors)
+
+        for name in selectors:
+            path = subject.path + '.content.' + name
+            assert os.path.exists(path)
+
+        with open(subject.path + '.content.title') as f:
+            assert f.read().startswith('<h1')
+
+        # Second run should pass
+        self.assertResponseDiffEmpty(result, selectors)
+
     def test_assertNoDiffSelector_non_ascii(self):  # noqa
         response = test.Client().get('/admin/')
 
@@ -72,6 +129,129 @@ class MixinTest(ResponseDiffTestMixin, test.TestCase):
         with self.assertRaises(DiffsFound):
             self.assertWebsiteSame()
 
+    def test_assertWebsiteSame_stale(self):  # noqa
+        def run(name):
+            result = unittest.TestResult()
+            StaleTest(name).run(result)
+            return [str(e[1]) for e in result.errors + result.failures]
+
+        paths = [
+            Response.for_test(StaleTest(name)).path
+            for name in ('test_crawls', 'test_failed')
+        ]
+
+        # Ensure we're clean
+        for path in paths:
+            if os.path.exists(path):  # pragma: no cover
+                shutil.rmtree(path)
+        for path in Response(paths[0]).region('nav').fixture_paths():
+            if os.path.exists(path):  # pragma: no cover
+                os.unlink(path)
+
+        # Each assertion creates its fixtures in turn
+        for i in range(3):
+            assert 'DiffsFound' in run('test_crawls')[0]
+
+        # Fixtures of all assertions of the test are used
+        assert run('test_crawls') == []
+
+        stale = os.path.join(paths[0], 'old', 'content')
+        notes = os.path.join(paths[0], 'notes.txt')
+        os.makedirs(os.path.dirname(stale))
+        for path in (stale, notes):
+            open(path, 'w').close()
+
+        errors = run('test_crawls')
+        assert len(errors) == 1
+        assert '[stale] ' + stale in errors[0]
+        assert notes not in errors[0]
+
+        with mock.patch('responsediff.response.PRUNE', '1'):
+            assert run('test_crawls') == []
+        assert not os.path.exists(os.path.dirname(stale))
+        assert os.path.exists(notes)
+
+        # Never pruned when the outcome of the test is unknown
+        os.makedirs(os.path.dirname(stale))
+        open(stale, 'w').close()
+        case = StaleTest('test_crawls')
+        case.setUp()
+        case.test_crawls()
+        with mock.patch('responsediff.response.PRUNE', '1'):
+            with self.assertRaises(DiffsFound):
+                case.responsediff_cleanup()
+        assert os.path.exists(stale)
+        shutil.rmtree(os.path.dirname(stale))
+
+        # Not checked when the test failed, later assertions did not run
+        run('test_failed')
+        os.makedirs(os.path.dirname(stale.replace(paths[0], paths[1])))
+        open(stale.replace(paths[0], paths[1]), 'w').close()
+        with mock.patch('responsediff.response.PRUNE', '1'):
+            errors = run('test_failed')
+        assert len(errors) == 1
+        assert 'DiffsFound' not in errors[0]
+        assert os.path.exists(stale.replace(paths[0], paths[1]))
+
+    def test_assertWebsiteSame_benchmark(self):  # noqa
+        subject = Response.for_test(self)
+
+        # Ensure we're clean
+        if os.path.exists(subject.path):  # pragma: no cover
+            shutil.rmtree(subject.path)
+        if os.path.exists(subject.filesystem_path('benchmark')):
+            # pragma: no cover
+            os.unlink(subject.filesystem_path('benchmark'))
+
+        client = mock.Mock()
+        client.get.return_value = http.HttpResponse(content='href="/a"')
+
+        def timer(durations):
+            # Return start and end times for each duration
+            times = []
+            for duration in durations:
+                times += [0, duration]
+            return mock.patch(
+                'responsediff.benchmark.timer',
+                side_effect=times,
+            )
+
+        # Fixtures are created first, without benchmarking
+        with mock.patch('responsediff.benchmark.timer') as no_timer:
+            with self.assertRaises(DiffsFound):
+                self.assertWebsiteSame(client=client, benchmark=3)
+        assert no_timer.call_count == 0
+
+        # Then the baseline
+        with timer([1, 1.1, .9] * 2):
+            with self.assertRaises(DiffsFound) as e:
+                self.assertWebsiteSame(client=client, benchmark=3)
+        assert subject.filesystem_path('benchmark') in e.exception.args[0]
+
+        # Slower within threshold should pass
+        with timer([1.1, 1.2, 1] * 2):
+            self.assertWebsiteSame(client=client, benchmark=3)
+
+        with timer([1, 1.1, .9] + [2, 2.1, 1.9]):
+            with self.assertRaises(LatencyRegression) as e:
+                self.assertWebsiteSame(client=client, benchmark=3)
+        assert e.exception.args[0].strip().startswith(
+            '/a: median 1000.0ms -> 2000.0ms')
+
+        # Baselines of URLs which are not benchmarked anymore are dropped
+        path = subject.filesystem_path('benchmark')
+        with open(path) as f:
+            baselines = json.load(f)
+        baselines['/old'] = baselines['/a']
+        with open(path, 'w') as f:
+            json.dump(baselines, f)
+
+        # Failures above were expected, the test passed
+        self.responsediff_failed = False
+        self.responsediff_cleanup()
+        with open(path) as f:
+            assert sorted(json.load(f).keys()) == ['/', '/a']
+
     def test_websiteTest(self):  # noqa
         path = Response.for_test(self).path
         if os.path.exists(path):  # pragma: no cover
@@ -152,6 +332,58 @@ class MixinTest(ResponseDiffTestMixin, test.TestCase):
         result = self.responsediff_website_crawl(client=client)
         assert result[0] == ['/', '/a', '/b']
 
+    def test_selectors_crawl(self):
+        subject = Response.for_test(self)
+
+        # Ensure we're clean
+        if os.path.exists(subject.path):  # pragma: no cover
+            shutil.rmtree(subject.path)
+        if os.path.exists(subject.region('nav').content_path):
+            # pragma: no cover
+            os.unlink(subject.region('nav').content_path)
+
+        client = mock.Mock()
+        client.get.return_value = http.HttpResponse('<nav>crawled</nav>')
+
+        def run():
+            self.assertWebsiteSame('/nav', client=client)
+            self.assertResponseDiffEmpty(
+                http.HttpResponse('<nav>region</nav>'), {'nav': 'nav'})
+
+        with self.assertRaises(DiffsFound):
+            run()
+        with self.assertRaises(DiffsFound):
+            run()
+
+        # Region and fixture of /nav must not overwrite each other
+        run()
+
+    def test_alias(self):
+        subject = Response.for_test(self, url='/')
+
+        # Ensure we're clean
+        if os.path.exists(os.path.dirname(subject.content_path)):
+            # pragma: no cover
+            shutil.rmtree(os.path.dirname(subject.content_path))
+
+        pages = {
+            '/': 'href="/a" href="/b"',
+            '/a': 'href="/c"',
+            '/b': '  href="/c"\n',
+            '/c': 'c',
+        }
+        client = mock.Mock()
+        client.get.side_effect = lambda url: http.HttpResponse(pages[url])
+
+        with mock.patch.object(self, 'responsediff_links',
+                               wraps=self.responsediff_links) as links:
+            result = self.responsediff_website_crawl(client=client)
+        assert result[0] == ['/', '/a', '/c', '/b']
+        assert links.call_count == 3
+
+        with open(Response.for_test(self, url='/b').metadata_path) as f:
+            assert json.load(f)['alias_of'] == '/a'
+
     def test_redirect(self):
         subject = Response.for_test(self, url='/')
 
@@ -5,10 +5,12 @@ import unittest
 from django import test
 from django.utils import six
 
+import mock
+
 import pytest
 
 from responsediff.exceptions import DiffsFound
-from responsediff.response import Response
+from responsediff.response import Response, is_fixture
 from responsediff.test import strip_parameters
 
 
@@ -22,6 +24,25 @@ def test_strip_parameters(fixture, expected):  # noqa: D103
     assert strip_parameters(['_a'], fixture) == expected
 
 
+@pytest.mark.parametrize('path,name,expected', [
+    ('/f/page', 'json', '/f/page.content.json'),
+    ('/f/page/', 'nav', '/f/page/content.nav'),
+])
+def test_region(path, name, expected):  # noqa: D103
+    region = Response(path).region(name)
+    assert region.content_path == expected
+    assert is_fixture(os.path.basename(region.metadata_path))
+
+    # /page.json is the fixture of the crawled URL /page.json
+    assert region.content_path != Response.for_url('/f', '/page.json').content_path
+
+
+@pytest.mark.parametrize('name', ['content', 'metadata', 'a.b', 'a/b'])
+def test_region_invalid(name):  # noqa: D103
+    with pytest.raises(ValueError):
+        Response('/f/page').region(name)
+
+
 class TestResponseDiff(unittest.TestCase):
     def test_path(self):
         expected = os.path.join(
@@ -96,3 +117,24 @@ class TestResponseDiff(unittest.TestCase):
 
         with self.assertRaises(DiffsFound) as e:
             expected.assertNoDiff(result)
+
+    def test_rewrite_only_changed(self):
+        result = test.Client().get('/adminfoo/')
+        expected = Response.for_test(self)
+        expected.make_diff(result)
+
+        with mock.patch('responsediff.response.REWRITE', '1'):
+            diffs, created = expected.make_diff(result)
+        assert not diffs and not created
+        assert expected.rewritten == []
+
+        with open(expected.content_path, 'w') as f:
+            f.write('bla')
+
+        with mock.patch('responsediff.response.REWRITE', '1'):
+            diffs, created = expected.make_diff(result)
+        assert not diffs and not created
+        assert expected.rewritten == [expected.content_path]
+
+        with open(expected.content_path, 'rb') as f:
+            assert f.read() == result.content
@@ -24,6 +24,7 @@ setup(
     keywords='django test response fixture diff',
     install_requires=[
         'beautifulsoup4',
+        'futures; python_version < "3"',
         'html5lib',
         'six'
     ],